@@ -0,0 +1,82 @@
+import streamlit as st
+import pandas as pd
+
+KEYS = ["Factory", "Product_ID", "Warehouse"]
+
+# sidebar filter type -> index level it slices on
+FILTER_LEVELS = {
+    "Product": "Product_ID",
+    "Warehouse": "Warehouse",
+    "Factory": "Factory"
+}
+
+# --- Load predictions ---
+@st.cache_data
+def load_data():
+    df = pd.read_csv("Dashboard/ffnetboost_predictions.csv", engine="pyarrow")
+    # narrow dtypes: categorical keys hash faster in groupby; Demand/Delay stay float64
+    # so the summed/averaged values shown and exported match the source data exactly
+    return df.astype({
+        "Factory": "category",
+        "Warehouse": "category",
+        "Product_ID": "category",
+        "Sustainable_Order": "int8"
+    })
+
+# --- Aggregate to one row per Factory–Product–Warehouse ---
+@st.cache_data
+def load_and_aggregate():
+    df = load_data()
+    agg = df.groupby(KEYS, as_index=False, sort=False, observed=True).agg(
+        Demand=("Demand", "sum"),
+        Delay=("Delay", "mean"),
+        Sustainable_Order=("Sustainable_Order", "mean"),
+        count=("Sustainable_Order", "size"),        # raw orders per group
+        sustain_sum=("Sustainable_Order", "sum")    # raw sustainable orders per group
+    )
+    agg["Sustainable_Order"] = (agg["Sustainable_Order"].to_numpy() * 100).round(1)
+    return agg
+
+# --- Same aggregate indexed by its keys, for slicing on filter changes ---
+@st.cache_data
+def get_indexed_agg():
+    return load_and_aggregate().set_index(KEYS).sort_index()
+
+# --- Sorted filter options (categories are already unique) ---
+@st.cache_data
+def get_axis_values():
+    df = load_data()
+    return (
+        sorted(df["Product_ID"].cat.categories),
+        sorted(df["Warehouse"].cat.categories),
+        sorted(df["Factory"].cat.categories)
+    )
+
+# --- Rows of the indexed aggregate matching one sidebar filter ---
+def apply_filter(df, kind, value):
+    return df.xs(value, level=FILTER_LEVELS[kind], drop_level=False).reset_index()
+
+# --- Weighted score per row; also returns the demand/delay scales for the breakdown ---
+def score(df, weights):
+    w_demand, w_delay, w_sustain = weights
+    demand = df["Demand"].to_numpy()
+    delay = df["Delay"].to_numpy()
+    sustain = df["Sustainable_Order"].to_numpy()
+    dmax = demand.max()
+    lmax = delay.max()
+    # guard against an all-zero column in the filtered slice
+    dscale = 1.0 / float(dmax) if dmax != 0 else 0.0
+    lscale = 1.0 / float(lmax) if lmax != 0 else 0.0
+
+    scores = (
+        w_demand * (demand * dscale)
+        + w_delay * (1 - delay * lscale)
+        + w_sustain * (sustain * 0.01)  # convert percent back to 0–1
+    )
+    return scores, dscale, lscale
+
+# --- CSV export, re-serialized only when the table contents change ---
+# keyed on the (small) table itself; bounded so slider drags can't grow it forever
+@st.cache_data(max_entries=32)
+def to_csv_bytes(df):
+    return df.to_csv(index=False).encode()
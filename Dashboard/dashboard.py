@@ -1,52 +1,55 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
+
+from core import (
+    get_indexed_agg, get_axis_values,
+    apply_filter, score, to_csv_bytes
+)
 
 st.set_page_config(page_title="FFNetBoost Ordering Dashboard", layout="wide")
 
 st.title("🧠 FFNetBoost Ordering Assistant")
 st.markdown("Smart and Sustainable product ordering decisions")
 
-# --- Load predictions ---
-@st.cache_data
-def load_data():
-    return pd.read_csv("Dashboard/ffnetboost_predictions.csv")
-
-df = load_data()
-
-# --- Aggregate to one row per Factory–Product–Warehouse ---
-agg_df = (
-    df.groupby(["Factory", "Product_ID", "Warehouse"], as_index=False)
-    .agg({
-        "Demand": "sum",
-        "Delay": "mean",
-        "Sustainable_Order": "mean"
-    })
-    .assign(Sustainable_Order=lambda d: (d.Sustainable_Order * 100).round(1))
+# shared layout for the two bar charts
+_BAR_LAYOUT = dict(
+    xaxis_title="Product",
+    legend_title="Warehouse",
+    margin=dict(t=50, b=50)
 )
-df = agg_df
+
+# --- One-time session setup: keep direct references instead of re-hashing cache keys every rerun ---
+if "indexed_df" not in st.session_state:
+    st.session_state.indexed_df = get_indexed_agg()
+    st.session_state.axis_values = get_axis_values()
+    palette = px.colors.qualitative.Plotly
+    st.session_state.color_map = {
+        w: palette[i % len(palette)] for i, w in enumerate(st.session_state.axis_values[1])
+    }
+
+indexed_df = st.session_state.indexed_df
 
 # --- Sidebar filters ---
 st.sidebar.header("🎯 Order Filters")
-product_ids = sorted(df["Product_ID"].unique())
-warehouses = sorted(df["Warehouse"].unique())
-factories = sorted(df["Factory"].unique())
+product_ids, warehouses, factories = st.session_state.axis_values
 
 selected_filter_type = st.sidebar.radio("Filter by", ["Product", "Warehouse", "Factory"])
 
 if selected_filter_type == "Product":
     selected_product = st.sidebar.selectbox("Select Product", product_ids)
-    filtered = df[df["Product_ID"] == selected_product]
+    filtered = apply_filter(indexed_df, "Product", selected_product)
     title_suffix = f"for Product {selected_product}"
 
 elif selected_filter_type == "Warehouse":
     selected_warehouse = st.sidebar.selectbox("Select Warehouse", warehouses)
-    filtered = df[df["Warehouse"] == selected_warehouse]
+    filtered = apply_filter(indexed_df, "Warehouse", selected_warehouse)
     title_suffix = f"for Warehouse {selected_warehouse}"
 
 else:
     selected_factory = st.sidebar.selectbox("Select Factory", factories)
-    filtered = df[df["Factory"] == selected_factory]
+    filtered = apply_filter(indexed_df, "Factory", selected_factory)
     title_suffix = f"for Factory {selected_factory}"
 
 # --- How many top recommendations? ---
@@ -78,38 +81,33 @@ if filtered.empty:
 
 # --- Compute Score ---
 if valid_weights:
-    def compute_score(row):
-        demand_score = row["Demand"] / filtered["Demand"].max()
-        delay_score = 1 - row["Delay"] / filtered["Delay"].max()
-        sustain_score = row["Sustainable_Order"] / 100  # convert percent back to 0–1
-        return w_demand * demand_score + w_delay * delay_score + w_sustain * sustain_score
-
-    filtered["Score"] = filtered.apply(compute_score, axis=1)
-    # get the top N
-    top_recs = filtered.sort_values("Score", ascending=False).head(top_n)
-    best_row = top_recs.iloc[0]
+    scores, dscale, lscale = score(filtered, (w_demand, w_delay, w_sustain))
+    filtered["Score"] = scores
+    # get the top N (partial selection, no full sort)
+    top_recs = filtered.nlargest(top_n, "Score")
+    best_row = filtered.iloc[filtered["Score"].to_numpy().argmax()]
 
 # --- Display full results table ---
-display_df = filtered[["Product_ID", "Factory", "Warehouse", "Demand", "Delay", "Sustainable_Order"]].copy()
-display_df.columns = [
-    "Product", "Factory", "Warehouse", 
-    "Predicted Demand", "Shipping Delay (days)", 
-    "Sustainability (%)"
-]
+display_df = filtered[["Product_ID", "Factory", "Warehouse", "Demand", "Delay", "Sustainable_Order"]].rename(columns={
+    "Product_ID": "Product",
+    "Demand": "Predicted Demand",
+    "Delay": "Shipping Delay (days)",
+    "Sustainable_Order": "Sustainability (%)"
+})
 if valid_weights:
-    display_df["Score"] = filtered["Score"].round(2)
+    display_df = display_df.assign(Score=filtered["Score"].round(2))
 
 sort_col = st.selectbox("Sort Results By", display_df.columns)
 ascending = not ("Delay" in sort_col or "Shipping" in sort_col)
-display_df = display_df.sort_values(sort_col, ascending=ascending)
+display_df = display_df.sort_values(sort_col, ascending=ascending, kind="stable", ignore_index=True)
 
 st.subheader(f"📊 FFNetBoost Predictions {title_suffix}")
-st.dataframe(display_df.reset_index(drop=True), use_container_width=True)
+st.dataframe(display_df, use_container_width=True)
 
 # --- Download Button ---
 st.download_button(
     label="💾 Download Results as CSV",
-    data=display_df.to_csv(index=False),
+    data=to_csv_bytes(display_df),
     file_name="filtered_recommendations.csv",
     mime="text/csv"
 )
@@ -132,8 +130,8 @@ if valid_weights:
 
         # 2) Breakdown of score components
         st.subheader("🔍 Score Breakdown")
-        demand_part  = w_demand  * (best.Demand  / filtered["Demand"].max())
-        delay_part   = w_delay   * (1 - best.Delay / filtered["Delay"].max())
+        demand_part  = w_demand  * (best.Demand  * dscale)
+        delay_part   = w_delay   * (1 - best.Delay * lscale)
         sustain_part = w_sustain * (best.Sustainable_Order / 100)
         st.write(f"- Demand component: **{demand_part:.2f}**")
         st.write(f"- Delay component: **{delay_part:.2f}**")
@@ -155,65 +153,60 @@ if valid_weights:
         st.table(recs.reset_index(drop=True))
 
 # --- Visual Charts (faceted by Factory, colored by Warehouse) ---
+# only ship the plotted columns to the browser; rows are already one per key
+plot_df = filtered[["Factory", "Warehouse", "Product_ID", "Demand", "Delay"]]
+# shared ordering for both charts
+category_orders = {
+    "Product_ID": sorted(plot_df["Product_ID"].unique()),
+    "Factory": sorted(plot_df["Factory"].unique())
+}
+demand_sorted = plot_df.sort_values("Demand", ascending=False)
+delay_sorted = demand_sorted.iloc[np.argsort(demand_sorted["Delay"].to_numpy(), kind="stable")]
 col1, col2 = st.columns(2)
 
 with col1:
     fig_demand = px.bar(
-        filtered.sort_values("Demand", ascending=False),
+        demand_sorted,
         x="Product_ID",
         y="Demand",
         color="Warehouse",
         facet_col="Factory",
-        category_orders={
-            "Product_ID": sorted(filtered["Product_ID"].unique()),
-            "Factory": sorted(filtered["Factory"].unique())
-        },
+        category_orders=category_orders,
+        color_discrete_map=st.session_state.color_map,
         title=f"📦 Predicted Demand {title_suffix}"
     )
     fig_demand.update_layout(
-        xaxis_title="Product",
+        **_BAR_LAYOUT,
         yaxis_title="Predicted Demand",
-        legend_title="Warehouse",
-        margin=dict(t=50, b=50)
+        uirevision=title_suffix  # keep zoom/legend state while only weights change
     )
     st.plotly_chart(fig_demand, use_container_width=True)
 
 with col2:
     fig_delay = px.bar(
-        filtered.sort_values("Delay"),
+        delay_sorted,
         x="Product_ID",
         y="Delay",
         color="Warehouse",
         facet_col="Factory",
-        category_orders={
-            "Product_ID": sorted(filtered["Product_ID"].unique()),
-            "Factory": sorted(filtered["Factory"].unique())
-        },
+        category_orders=category_orders,
+        color_discrete_map=st.session_state.color_map,
         title=f"⏱ Predicted Delay {title_suffix}"
     )
     fig_delay.update_layout(
-        xaxis_title="Product",
+        **_BAR_LAYOUT,
         yaxis_title="Shipping Delay (days)",
-        legend_title="Warehouse",
-        margin=dict(t=50, b=50)
+        uirevision=title_suffix  # keep zoom/legend state while only weights change
     )
     st.plotly_chart(fig_delay, use_container_width=True)
 
-# --- Pie Chart for Sustainability (raw 0/1 counts) ---
-orig = load_data()
-orig_filtered = orig.merge(
-    filtered[["Factory", "Product_ID", "Warehouse"]],
-    on=["Factory", "Product_ID", "Warehouse"],
-    how="inner"
-)
-sustain_count = orig_filtered["Sustainable_Order"] \
-    .map({1: "Sustainable", 0: "Not Sustainable"}) \
-    .value_counts()
-fig_sustain = px.pie(
-    names=sustain_count.index,
-    values=sustain_count.values,
-    title="🌱 Sustainability Split",
-    color=sustain_count.index,
-    color_discrete_map={"Sustainable": "green", "Not Sustainable": "red"}
-)
+# --- Pie Chart for Sustainability (raw 0/1 counts, from per-group totals) ---
+yes = int(filtered["sustain_sum"].to_numpy().sum())
+no = int(filtered["count"].to_numpy().sum()) - yes
+fig_sustain = go.Figure(go.Pie(
+    labels=["Sustainable", "Not Sustainable"],
+    values=[yes, no],
+    marker=dict(colors=["green", "red"])
+))
+fig_sustain.update_layout(title="🌱 Sustainability Split")
 st.plotly_chart(fig_sustain, use_container_width=True)